@@ -1,16 +1,292 @@
 import os
+import sys
 import json
 import csv
+import hashlib
 import requests
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 import time
+import random
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Fixtures enriched concurrently (each needs an H2H and a prediction call)
+FIXTURE_WORKERS = 4
+
+# Embedded match data on an Understat team page
+UNDERSTAT_DATES_RE = re.compile(rb"var datesData\s*=\s*JSON\.parse\('(.+?)'\)")
+
+# Common suffixes dropped before matching team names across APIs
+TEAM_SUFFIX_RE = re.compile(r' (?:fc|united|city|town|hotspur|wanderers)')
+
+# Words that flag a news article as injury/availability news (substring match, like before)
+INJURY_KEYWORDS_RE = re.compile(r'injur(?:y|ed)|out|doubt|return', re.IGNORECASE)
+
+# Client-side cap on calls started per rolling minute, so bursts don't trip a 429
+MAX_CALLS_PER_MINUTE = {
+    'api-football': 30,
+    'news': 30
+}
+
+# Transient statuses worth retrying, and how many times to try a call in total
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 4
+
+# Column order of data/upcoming_matches.csv
+UPCOMING_FIELDS = ('match_id', 'date', 'home_team', 'away_team',
+                   'competition', 'competition_code', 'status')
+
+# How long a cached API-Football prediction is reused without asking again, in seconds
+PREDICTION_MAX_AGE = 6 * 3600
+
+# Where response bodies are kept for conditional GETs (restored between workflow runs)
+HTTP_CACHE_DIR = 'data/.http_cache'
+
+# Cached responses not stored or revalidated for this long are deleted at startup, in seconds
+HTTP_CACHE_MAX_AGE = 7 * 24 * 3600
+
+# Team names mapped to Understat URL slugs
+UNDERSTAT_TEAMS = {
+    'Manchester City': 'Manchester_City',
+    'Manchester United': 'Manchester_United',
+    'Liverpool': 'Liverpool',
+    'Chelsea': 'Chelsea',
+    'Arsenal': 'Arsenal',
+    'Tottenham Hotspur': 'Tottenham',
+    'Newcastle United': 'Newcastle_United',
+    'Brighton & Hove Albion': 'Brighton',
+    'Aston Villa': 'Aston_Villa',
+    'West Ham United': 'West_Ham',
+    'Wolverhampton Wanderers': 'Wolverhampton_Wanderers',
+    'Fulham': 'Fulham',
+    'Brentford': 'Brentford',
+    'Crystal Palace': 'Crystal_Palace',
+    'Nottingham Forest': 'Nottingham_Forest',
+    'Everton': 'Everton',
+    'Leicester City': 'Leicester',
+    'Southampton': 'Southampton',
+    'Ipswich Town': 'Ipswich',
+    'Bournemouth': 'Bournemouth'
+}
+
+# Same map keyed by lowercase names without spaces, for near-miss spellings
+UNDERSTAT_TEAMS_NORMALIZED = {name.lower().replace(' ', ''): slug for name, slug in UNDERSTAT_TEAMS.items()}
+
+# Minimum gap between calls to each API, in seconds
+MIN_CALL_INTERVAL = {
+    'api-football': 0.25,
+    'odds': 0,
+    'news': 0.5,
+    'understat': 1.0  # Be respectful to Understat
+}
 
 print("=" * 50)
 print("COMPLETE PREDICTION SYSTEM")
 print(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
 print("=" * 50)
 
+@lru_cache(maxsize=256)
+def normalize_team(name):
+    """Lowercase a team name and remove common suffixes"""
+    return TEAM_SUFFIX_RE.sub('', name.lower())
+
+def understat_slug(team):
+    """Understat URL slug for a team name, or None if the team isn't mapped"""
+    return UNDERSTAT_TEAMS.get(team) or UNDERSTAT_TEAMS_NORMALIZED.get(team.lower().replace(' ', ''))
+
+def empty_h2h():
+    """H2H stats for a fixture without any usable head-to-head history"""
+    return {'summary': 'No H2H data', 'home_wins': 0, 'draws': 0, 'away_wins': 0}
+
+def has_api_results(response):
+    """True if an API-Football body has results and no errors (it reports errors with a 200)"""
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return isinstance(data, dict) and bool(data.get('response')) and not data.get('errors')
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retrying: the server's Retry-After if given, else exponential backoff with jitter"""
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return min(60.0, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return min(60.0, max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()))
+            except (TypeError, ValueError):
+                pass
+    return min(60.0, 2 ** attempt + random.uniform(0, 1))
+
+class HeaderRateLimiter:
+    """Spaces out calls to each API, slowing down when its rate-limit headers run low"""
+    
+    # Each rate-limit window as (remaining, reset, limit) headers plus the window length to assume
+    # when no reset header comes with it. RapidAPI sends its per-minute and daily pairs together.
+    HEADER_FAMILIES = (
+        # RapidAPI per-minute limit (checked first so it isn't hidden by the daily pair)
+        ('x-ratelimit-remaining', 'x-ratelimit-reset', 'x-ratelimit-limit', 60),
+        # RapidAPI daily quota
+        ('x-ratelimit-requests-remaining', 'x-ratelimit-requests-reset', 'x-ratelimit-requests-limit', None),
+        # The Odds API monthly credits
+        ('x-requests-remaining', None, None, None)
+    )
+    
+    # Warn when a quota is down to this share of its limit (or this many calls if the limit isn't sent)
+    LOW_QUOTA_SHARE = 0.1
+    LOW_QUOTA_CALLS = 10
+    
+    def __init__(self, min_interval, max_per_minute=None):
+        self.min_interval = dict(min_interval)
+        self.interval = dict(min_interval)
+        self.max_per_minute = dict(max_per_minute or {})
+        self.next_call = {}
+        self.recent_calls = {}
+        self.warned = set()
+        self.lock = threading.Lock()
+    
+    def wait(self, api):
+        """Block until the next call slot for this API, then reserve the one after it"""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_call.get(api, now))
+            
+            # Sliding one-minute window: never start more than the per-minute cap
+            limit = self.max_per_minute.get(api)
+            if limit:
+                window = self.recent_calls.setdefault(api, deque())
+                while window and window[0] <= start - 60:
+                    window.popleft()
+                while len(window) >= limit:
+                    start = max(start, window.popleft() + 60)
+                window.append(start)
+            
+            self.next_call[api] = start + self.interval.get(api, 0)
+        if start > now:
+            time.sleep(start - now)
+    
+    def update(self, api, response):
+        """Spread the calls left in a short rate-limit window over the time until it resets"""
+        for remaining_header, reset_header, limit_header, window in self.HEADER_FAMILIES:
+            remaining = self._header_int(response, remaining_header)
+            if remaining is None:
+                continue
+            reset = self._header_int(response, reset_header)
+            if reset is None:
+                reset = window
+            
+            # Only per-minute style windows are paced; daily/monthly quotas just get reported
+            if reset is not None and reset <= 60:
+                with self.lock:
+                    self.interval[api] = max(self.min_interval.get(api, 0), reset / max(remaining, 1))
+            else:
+                self._check_quota(api, remaining, self._header_int(response, limit_header))
+    
+    def _check_quota(self, api, remaining, limit):
+        """Warn once per run when an API's quota is nearly used up"""
+        threshold = max(2, int(limit * self.LOW_QUOTA_SHARE)) if limit else self.LOW_QUOTA_CALLS
+        if remaining > threshold:
+            return
+        
+        with self.lock:
+            if api in self.warned:
+                return
+            self.warned.add(api)
+        print(f"  ⚠️ {api}: only {remaining} calls left in the current quota")
+    
+    @staticmethod
+    def _header_int(response, name):
+        value = response.headers.get(name) if name else None
+        if value is None:
+            return None
+        try:
+            return int(float(value))
+        except ValueError:
+            return None
+
+class ResponseCache:
+    """Keeps response bodies on disk with their ETag/Last-Modified so unchanged pages can be revalidated"""
+    
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def prune(self, max_age):
+        """Delete entries that haven't been stored or revalidated within max_age seconds"""
+        cutoff = time.time() - max_age
+        for name in os.listdir(self.directory):
+            if not name.endswith('.body'):
+                continue
+            path = os.path.join(self.directory, name[:-len('.body')])
+            try:
+                with open(path + '.json') as f:
+                    # Entries from before 'stored' was recorded fall back to the file's age
+                    stored = json.load(f).get('stored') or os.path.getmtime(path + '.json')
+            except (OSError, ValueError):
+                stored = 0
+            if stored < cutoff:
+                for ext in ('.body', '.json'):
+                    try:
+                        os.remove(path + ext)
+                    except OSError:
+                        pass
+    
+    def _path(self, url, params):
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        return os.path.join(self.directory, hashlib.sha1(full_url.encode()).hexdigest())
+    
+    def load(self, url, params=None):
+        """Return (validators, body) for a cached URL, or None"""
+        path = self._path(url, params)
+        try:
+            with open(path + '.json') as f:
+                validators = json.load(f)
+            with open(path + '.body', 'rb') as f:
+                return validators, f.read()
+        except (OSError, ValueError):
+            return None
+    
+    def conditional_headers(self, validators):
+        """Request headers that make a GET conditional on the cached copy"""
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+    
+    def refresh(self, url, params, validators, response):
+        """Mark a cached copy as current again after a 304, keeping validators the 304 didn't resend"""
+        validators = dict(validators,
+                          etag=response.headers.get('ETag') or validators.get('etag'),
+                          last_modified=response.headers.get('Last-Modified') or validators.get('last_modified'),
+                          stored=time.time())
+        with open(self._path(url, params) + '.json', 'w') as f:
+            json.dump(validators, f)
+    
+    def store(self, url, params, response, keep=False):
+        """Cache a 200 response if the server gave us something to revalidate with (or keep=True)"""
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored': time.time()
+        }
+        if not (keep or validators['etag'] or validators['last_modified']):
+            return
+        
+        path = self._path(url, params)
+        with open(path + '.body', 'wb') as f:
+            f.write(response.content)
+        with open(path + '.json', 'w') as f:
+            json.dump(validators, f)
+
 class CompleteFetcher:
     def __init__(self):
         # API Keys
@@ -19,6 +295,16 @@ class CompleteFetcher:
         self.odds_api_key = os.environ.get('ODDS_API_KEY', '')
         self.news_api_key = os.environ.get('NEWS_API_KEY', '')
         
+        # One UTC clock reading per run so every stage uses the same dates and season
+        # (the APIs filter on UTC dates)
+        self.now = datetime.now(timezone.utc)
+        self.season = self.now.year if self.now.month >= 8 else self.now.year - 1
+        
+        # Shared HTTP session so repeat calls to the same host reuse connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+        self.session.mount('https://', adapter)
+        
         # Create data directory
         os.makedirs('data', exist_ok=True)
         
@@ -29,6 +315,14 @@ class CompleteFetcher:
             'news': 0,
             'understat': 0
         }
+        self.calls_lock = threading.Lock()
+        self.rate_limiter = HeaderRateLimiter(MIN_CALL_INTERVAL, MAX_CALLS_PER_MINUTE)
+        
+        self.http_cache = ResponseCache(HTTP_CACHE_DIR)
+        self.http_cache.prune(HTTP_CACHE_MAX_AGE)
+        
+        # Understat results per (team, season), so a team is only scraped once per run
+        self.xg_cache = {}
         
     def fetch_pl_fixtures_with_h2h(self):
         """Fetch Premier League fixtures with H2H data"""
@@ -43,22 +337,17 @@ class CompleteFetcher:
             "X-RapidAPI-Host": self.rapidapi_host
         }
         
-        # Get current season
-        current_year = datetime.now().year
-        season = current_year if datetime.now().month >= 8 else current_year - 1
-        
         # Fetch fixtures
         url = "https://api-football-v1.p.rapidapi.com/v3/fixtures"
         params = {
             "league": 39,  # Premier League
-            "season": season,
-            "from": datetime.now().strftime('%Y-%m-%d'),
-            "to": (datetime.now() + timedelta(days=14)).strftime('%Y-%m-%d')
+            "season": self.season,
+            "from": self.now.strftime('%Y-%m-%d'),
+            "to": (self.now + timedelta(days=14)).strftime('%Y-%m-%d')
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
-            self.api_calls['api-football'] += 1
+            response = self.get('api-football', url, headers=headers, params=params, cache=True)
             
             if response.status_code != 200:
                 print(f"❌ API Error: {response.status_code}")
@@ -69,84 +358,13 @@ class CompleteFetcher:
             
             print(f"✅ Found {len(fixtures)} fixtures")
             
-            enhanced_fixtures = []
+            # Skip finished matches, then take the first 10 still to play
+            pending = [f for f in fixtures
+                       if f['fixture']['status']['short'] not in ['FT', 'AET', 'PEN']][:10]
             
-            # Process each fixture
-            for fixture in fixtures[:10]:  # Limit to 10
-                if fixture['fixture']['status']['short'] in ['FT', 'AET', 'PEN']:
-                    continue  # Skip finished matches
-                
-                match_data = {
-                    'match_id': str(fixture['fixture']['id']),
-                    'date': fixture['fixture']['date'],
-                    'home_team': fixture['teams']['home']['name'],
-                    'away_team': fixture['teams']['away']['name'],
-                    'home_team_id': fixture['teams']['home']['id'],
-                    'away_team_id': fixture['teams']['away']['id'],
-                    'competition': 'Premier League',
-                    'venue': fixture['fixture']['venue']['name'] if fixture['fixture'].get('venue') else ''
-                }
-                
-                # Get H2H data
-                print(f"  Getting H2H for {match_data['home_team']} vs {match_data['away_team']}...")
-                h2h_url = "https://api-football-v1.p.rapidapi.com/v3/fixtures/headtohead"
-                h2h_params = {
-                    "h2h": f"{match_data['home_team_id']}-{match_data['away_team_id']}",
-                    "last": 10
-                }
-                
-                try:
-                    h2h_response = requests.get(h2h_url, headers=headers, params=h2h_params)
-                    self.api_calls['api-football'] += 1
-                    
-                    if h2h_response.status_code == 200:
-                        h2h_data = h2h_response.json()
-                        h2h_matches = h2h_data.get('response', [])
-                        
-                        # Analyze H2H
-                        h2h_stats = self.analyze_h2h(h2h_matches, match_data['home_team_id'])
-                        match_data['h2h'] = h2h_stats
-                        print(f"    ✅ H2H: {h2h_stats['summary']}")
-                    else:
-                        match_data['h2h'] = {'summary': 'No H2H data', 'home_wins': 0, 'draws': 0, 'away_wins': 0}
-                        
-                except:
-                    match_data['h2h'] = {'summary': 'No H2H data', 'home_wins': 0, 'draws': 0, 'away_wins': 0}
-                
-                # Get predictions
-                print(f"  Getting prediction...")
-                pred_url = "https://api-football-v1.p.rapidapi.com/v3/predictions"
-                pred_params = {"fixture": match_data['match_id']}
-                
-                try:
-                    pred_response = requests.get(pred_url, headers=headers, params=pred_params)
-                    self.api_calls['api-football'] += 1
-                    
-                    if pred_response.status_code == 200:
-                        pred_data = pred_response.json()
-                        if pred_data.get('response'):
-                            prediction = pred_data['response'][0]['predictions']
-                            teams = pred_data['response'][0]['teams']
-                            
-                            match_data['prediction'] = {
-                                'home_win': prediction['percent']['home'],
-                                'draw': prediction['percent']['draw'],
-                                'away_win': prediction['percent']['away'],
-                                'goals_home': prediction['goals'].get('home', '-'),
-                                'goals_away': prediction['goals'].get('away', '-'),
-                                'advice': prediction.get('advice', ''),
-                                'home_form': teams['home'].get('league', {}).get('form', '')[-5:],
-                                'away_form': teams['away'].get('league', {}).get('form', '')[-5:]
-                            }
-                            print(f"    ✅ Prediction: H{prediction['percent']['home']} D{prediction['percent']['draw']} A{prediction['percent']['away']}")
-                    
-                except:
-                    pass
-                
-                enhanced_fixtures.append(match_data)
-                
-                # Small delay to avoid rate limits
-                time.sleep(0.5)
+            # Enrich a few fixtures at a time; each one waits on two API calls
+            with ThreadPoolExecutor(max_workers=FIXTURE_WORKERS) as executor:
+                enhanced_fixtures = list(executor.map(lambda f: self.enrich_fixture(f, headers), pending))
             
             return enhanced_fixtures
             
@@ -154,10 +372,147 @@ class CompleteFetcher:
             print(f"❌ Error: {e}")
             return []
     
+    def enrich_fixture(self, fixture, headers):
+        """Attach H2H stats and the API-Football prediction to one fixture"""
+        info = fixture['fixture']
+        home, away = fixture['teams']['home'], fixture['teams']['away']
+        
+        match_data = {
+            'match_id': str(info['id']),
+            'date': info['date'],
+            'home_team': home['name'],
+            'away_team': away['name'],
+            'home_team_id': home['id'],
+            'away_team_id': away['id'],
+            'competition': 'Premier League',
+            'venue': info['venue']['name'] if info.get('venue') else ''
+        }
+        
+        # Collect output and print it in one go so concurrent fixtures don't interleave
+        log = []
+        
+        # Get H2H data
+        log.append(f"  Getting H2H for {match_data['home_team']} vs {match_data['away_team']}...")
+        h2h_url = "https://api-football-v1.p.rapidapi.com/v3/fixtures/headtohead"
+        h2h_params = {
+            "h2h": f"{match_data['home_team_id']}-{match_data['away_team_id']}",
+            "last": 10
+        }
+        
+        try:
+            h2h_response = self.get('api-football', h2h_url, headers=headers, params=h2h_params, cache=True)
+            
+            if h2h_response.status_code == 200:
+                h2h_data = h2h_response.json()
+                h2h_matches = h2h_data.get('response', [])
+                
+                # Analyze H2H
+                h2h_stats = self.analyze_h2h(h2h_matches, match_data['home_team_id'])
+                match_data['h2h'] = h2h_stats
+                log.append(f"    ✅ H2H: {h2h_stats['summary']}")
+            else:
+                match_data['h2h'] = empty_h2h()
+                
+        except:
+            match_data['h2h'] = empty_h2h()
+        
+        # Get predictions
+        log.append(f"  Getting prediction...")
+        pred_url = "https://api-football-v1.p.rapidapi.com/v3/predictions"
+        pred_params = {"fixture": match_data['match_id']}
+        
+        try:
+            pred_response = self.get('api-football', pred_url, headers=headers, params=pred_params,
+                                     cache=True, max_age=PREDICTION_MAX_AGE, usable=has_api_results)
+            
+            if pred_response.status_code == 200:
+                pred_data = pred_response.json()
+                if pred_data.get('response'):
+                    prediction = pred_data['response'][0]['predictions']
+                    teams = pred_data['response'][0]['teams']
+                    percent = prediction['percent']
+                    
+                    match_data['prediction'] = {
+                        'home_win': percent['home'],
+                        'draw': percent['draw'],
+                        'away_win': percent['away'],
+                        'goals_home': prediction['goals'].get('home', '-'),
+                        'goals_away': prediction['goals'].get('away', '-'),
+                        'advice': prediction.get('advice', ''),
+                        'home_form': teams['home'].get('league', {}).get('form', '')[-5:],
+                        'away_form': teams['away'].get('league', {}).get('form', '')[-5:]
+                    }
+                    log.append(f"    ✅ Prediction: H{percent['home']} D{percent['draw']} A{percent['away']}")
+            
+        except:
+            pass
+        
+        # One write per block; print() would emit the trailing newline separately
+        sys.stdout.write("\n".join(log) + "\n")
+        
+        return match_data
+    
+    def get(self, api, url, cache=False, max_age=None, usable=None, **kwargs):
+        """GET through the shared session, pacing and counting calls per API
+        
+        With cache=True the request is made conditional on the last cached copy,
+        and a 304 Not Modified is answered from disk as a normal 200. With max_age
+        a cached copy younger than that many seconds is returned without a call.
+        If given, usable(response) decides which 200 bodies get cached or reused.
+        """
+        cached = self.http_cache.load(url, kwargs.get('params')) if cache else None
+        if cached:
+            validators, body = cached
+            response = requests.Response()
+            response.status_code = 200
+            response.url = url
+            response._content = body
+            if usable is not None and not usable(response):
+                # Fetch afresh rather than revalidate a body that shouldn't have been kept
+                cached = None
+            elif max_age and time.time() - validators.get('stored', 0) < max_age:
+                return response
+            else:
+                kwargs['headers'] = dict(kwargs.get('headers') or {}, **self.http_cache.conditional_headers(validators))
+        
+        for attempt in range(MAX_ATTEMPTS):
+            self.rate_limiter.wait(api)
+            try:
+                response = self.session.get(url, timeout=10, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                time.sleep(retry_delay(None, attempt))
+                continue
+            
+            self.count_call(api)
+            self.rate_limiter.update(api, response)
+            
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                break
+            
+            delay = retry_delay(response, attempt)
+            print(f"  ⏳ {api} returned {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        
+        if cached and response.status_code == 304:
+            self.http_cache.refresh(url, kwargs.get('params'), validators, response)
+            response.status_code = 200
+            response._content = body
+        elif cache and response.status_code == 200 and (usable is None or usable(response)):
+            self.http_cache.store(url, kwargs.get('params'), response, keep=max_age is not None)
+        
+        return response
+    
+    def count_call(self, api):
+        """Record one call against an API (safe across worker threads)"""
+        with self.calls_lock:
+            self.api_calls[api] += 1
+    
     def analyze_h2h(self, h2h_matches, home_team_id):
         """Analyze head-to-head matches"""
         if not h2h_matches:
-            return {'summary': 'No H2H data', 'home_wins': 0, 'draws': 0, 'away_wins': 0}
+            return empty_h2h()
         
         stats = {'home_wins': 0, 'draws': 0, 'away_wins': 0, 'total_goals': 0}
         
@@ -170,21 +525,16 @@ class CompleteFetcher:
                 
             stats['total_goals'] += home_goals + away_goals
             
-            # Check who was home in this H2H match
-            if match['teams']['home']['id'] == home_team_id:
-                if home_goals > away_goals:
-                    stats['home_wins'] += 1
-                elif home_goals < away_goals:
-                    stats['away_wins'] += 1
-                else:
-                    stats['draws'] += 1
+            # Flip the score when today's away side was at home in this H2H match
+            if match['teams']['home']['id'] != home_team_id:
+                home_goals, away_goals = away_goals, home_goals
+            
+            if home_goals > away_goals:
+                stats['home_wins'] += 1
+            elif home_goals < away_goals:
+                stats['away_wins'] += 1
             else:
-                if away_goals > home_goals:
-                    stats['home_wins'] += 1
-                elif away_goals < home_goals:
-                    stats['away_wins'] += 1
-                else:
-                    stats['draws'] += 1
+                stats['draws'] += 1
         
         total = stats['home_wins'] + stats['draws'] + stats['away_wins']
         if total > 0:
@@ -214,8 +564,7 @@ class CompleteFetcher:
         }
         
         try:
-            response = requests.get(url, params=params)
-            self.api_calls['odds'] += 1
+            response = self.get('odds', url, params=params, cache=True)
             
             if response.status_code != 200:
                 print(f"❌ Odds API Error: {response.status_code}")
@@ -224,30 +573,39 @@ class CompleteFetcher:
             odds_data = response.json()
             print(f"✅ Found odds for {len(odds_data)} matches")
             
+            # Index odds by full lowercased team names so exact name matches are a single lookup
+            # (suffix-stripped names can collide, e.g. Manchester City/United)
+            odds_index = {}
+            for odds_match in odds_data:
+                odds_index.setdefault((odds_match['home_team'].lower(), odds_match['away_team'].lower()), odds_match)
+            
             # Match odds to fixtures
             for fixture in fixtures:
                 home_team = fixture['home_team'].lower()
                 away_team = fixture['away_team'].lower()
                 
-                for odds_match in odds_data:
-                    # Fuzzy match team names
-                    if (self.fuzzy_match(home_team, odds_match['home_team'].lower()) and 
-                        self.fuzzy_match(away_team, odds_match['away_team'].lower())):
-                        
-                        # Get best odds from all bookmakers
-                        best_odds = self.get_best_odds(odds_match)
-                        fixture['odds'] = best_odds
-                        
-                        # Convert odds to implied probabilities
-                        if best_odds:
-                            total = 1/best_odds['home'] + 1/best_odds['draw'] + 1/best_odds['away']
-                            fixture['market_probs'] = {
-                                'home': round((1/best_odds['home'])/total, 3),
-                                'draw': round((1/best_odds['draw'])/total, 3),
-                                'away': round((1/best_odds['away'])/total, 3)
-                            }
-                            print(f"  ✅ Odds for {fixture['home_team']}: {fixture['market_probs']}")
-                        break
+                odds_match = odds_index.get((home_team, away_team))
+                if odds_match is None:
+                    # Fall back to fuzzy matching suffix-stripped names, in the API's order
+                    home_short, away_short = normalize_team(home_team), normalize_team(away_team)
+                    odds_match = next((o for o in odds_data
+                                       if self.fuzzy_match(home_short, normalize_team(o['home_team']))
+                                       and self.fuzzy_match(away_short, normalize_team(o['away_team']))), None)
+                
+                if odds_match is not None:
+                    # Get best odds from all bookmakers
+                    best_odds = self.get_best_odds(odds_match)
+                    fixture['odds'] = best_odds
+                    
+                    # Convert odds to implied probabilities
+                    if best_odds:
+                        total = 1/best_odds['home'] + 1/best_odds['draw'] + 1/best_odds['away']
+                        fixture['market_probs'] = {
+                            'home': round((1/best_odds['home'])/total, 3),
+                            'draw': round((1/best_odds['draw'])/total, 3),
+                            'away': round((1/best_odds['away'])/total, 3)
+                        }
+                        print(f"  ✅ Odds for {fixture['home_team']}: {fixture['market_probs']}")
             
             # Show API usage
             remaining = response.headers.get('x-requests-remaining', 'Unknown')
@@ -259,12 +617,7 @@ class CompleteFetcher:
         return fixtures
     
     def fuzzy_match(self, str1, str2):
-        """Simple fuzzy string matching"""
-        # Remove common suffixes
-        for suffix in [' fc', ' united', ' city', ' town', ' hotspur', ' wanderers']:
-            str1 = str1.replace(suffix, '')
-            str2 = str2.replace(suffix, '')
-        
+        """Simple fuzzy matching of two normalized team names"""
         # Check if main part matches
         return str1 in str2 or str2 in str1
     
@@ -273,25 +626,22 @@ class CompleteFetcher:
         if not odds_match.get('bookmakers'):
             return None
         
-        best = {'home': 0, 'draw': 0, 'away': 0, 'over_25': 0, 'under_25': 0}
+        # Collect every bookmaker's price per outcome, then take the best of each once
+        prices = {'home': [], 'draw': [], 'away': [], 'over_25': [], 'under_25': []}
+        h2h_keys = {odds_match['home_team']: 'home', odds_match['away_team']: 'away'}
         
         for bookmaker in odds_match['bookmakers']:
             for market in bookmaker['markets']:
                 if market['key'] == 'h2h':
                     for outcome in market['outcomes']:
-                        if outcome['name'] == odds_match['home_team']:
-                            best['home'] = max(best['home'], outcome['price'])
-                        elif outcome['name'] == odds_match['away_team']:
-                            best['away'] = max(best['away'], outcome['price'])
-                        else:  # Draw
-                            best['draw'] = max(best['draw'], outcome['price'])
-                            
+                        prices[h2h_keys.get(outcome['name'], 'draw')].append(outcome['price'])
+                
                 elif market['key'] == 'totals' and 'over_under' in market:
                     for outcome in market['outcomes']:
-                        if outcome['name'] == 'Over' and outcome['point'] == 2.5:
-                            best['over_25'] = max(best['over_25'], outcome['price'])
-                        elif outcome['name'] == 'Under' and outcome['point'] == 2.5:
-                            best['under_25'] = max(best['under_25'], outcome['price'])
+                        if outcome['name'] in ('Over', 'Under') and outcome['point'] == 2.5:
+                            prices['over_25' if outcome['name'] == 'Over' else 'under_25'].append(outcome['price'])
+        
+        best = {key: max(values, default=0) for key, values in prices.items()}
         
         return best if best['home'] > 0 else None
     
@@ -299,83 +649,61 @@ class CompleteFetcher:
         """Fetch xG data from Understat"""
         print("\n[3/5] Fetching xG data...")
         
-        # Map team names to Understat format
-        team_map = {
-            'Manchester City': 'Manchester_City',
-            'Manchester United': 'Manchester_United', 
-            'Liverpool': 'Liverpool',
-            'Chelsea': 'Chelsea',
-            'Arsenal': 'Arsenal',
-            'Tottenham Hotspur': 'Tottenham',
-            'Newcastle United': 'Newcastle_United',
-            'Brighton & Hove Albion': 'Brighton',
-            'Aston Villa': 'Aston_Villa',
-            'West Ham United': 'West_Ham',
-            'Wolverhampton Wanderers': 'Wolverhampton_Wanderers',
-            'Fulham': 'Fulham',
-            'Brentford': 'Brentford',
-            'Crystal Palace': 'Crystal_Palace',
-            'Nottingham Forest': 'Nottingham_Forest',
-            'Everton': 'Everton',
-            'Leicester City': 'Leicester',
-            'Southampton': 'Southampton',
-            'Ipswich Town': 'Ipswich',
-            'Bournemouth': 'Bournemouth'
-        }
-        
-        season = datetime.now().year if datetime.now().month >= 8 else datetime.now().year - 1
-        
         for fixture in fixtures:
-            home_understat = team_map.get(fixture['home_team'])
-            away_understat = team_map.get(fixture['away_team'])
+            home_understat = understat_slug(fixture['home_team'])
+            away_understat = understat_slug(fixture['away_team'])
             
             if home_understat:
-                xg_url = f"https://understat.com/team/{home_understat}/{season}"
                 print(f"  Fetching xG for {fixture['home_team']}...")
                 
                 try:
-                    response = requests.get(xg_url)
-                    self.api_calls['understat'] += 1
+                    team_xg = self.fetch_understat_team(home_understat, self.season)
                     
-                    if response.status_code == 200:
-                        # Extract JSON data from HTML
-                        import re
-                        json_pattern = r"var datesData\s*=\s*JSON\.parse\('(.+?)'\)"
-                        match = re.search(json_pattern, response.text)
+                    if team_xg:
+                        avg_xg, avg_xga = team_xg
                         
-                        if match:
-                            json_str = match.group(1).replace("\\'", "'")
-                            xg_data = json.loads(json_str)
-                            
-                            # Get last 5 matches xG
-                            recent_xg = []
-                            for match_data in list(xg_data)[-5:]:
-                                recent_xg.append({
-                                    'xG': float(match_data.get('xG', 0)),
-                                    'xGA': float(match_data.get('xGA', 0)),
-                                    'scored': int(match_data.get('scored', 0)),
-                                    'missed': int(match_data.get('missed', 0))
-                                })
+                        if 'xg_data' not in fixture:
+                            fixture['xg_data'] = {}
                             
-                            if recent_xg:
-                                avg_xg = sum(m['xG'] for m in recent_xg) / len(recent_xg)
-                                avg_xga = sum(m['xGA'] for m in recent_xg) / len(recent_xg)
-                                
-                                if 'xg_data' not in fixture:
-                                    fixture['xg_data'] = {}
-                                    
-                                fixture['xg_data'][f'{fixture["home_team"]}_xG'] = round(avg_xg, 2)
-                                fixture['xg_data'][f'{fixture["home_team"]}_xGA'] = round(avg_xga, 2)
-                                
-                                print(f"    ✅ {fixture['home_team']} xG: {avg_xg:.2f}, xGA: {avg_xga:.2f}")
+                        fixture['xg_data'][f'{fixture["home_team"]}_xG'] = round(avg_xg, 2)
+                        fixture['xg_data'][f'{fixture["home_team"]}_xGA'] = round(avg_xga, 2)
+                        
+                        print(f"    ✅ {fixture['home_team']} xG: {avg_xg:.2f}, xGA: {avg_xga:.2f}")
                 
                 except Exception as e:
                     print(f"    ⚠️ Could not get xG: {e}")
-                
-                time.sleep(1)  # Be respectful to Understat
         
         return fixtures
     
+    def fetch_understat_team(self, team_slug, season):
+        """Average xG/xGA over a team's last 5 Understat matches, fetched once per run"""
+        key = (team_slug, season)
+        if key in self.xg_cache:
+            return self.xg_cache[key]
+        
+        response = self.get('understat', f"https://understat.com/team/{team_slug}/{season}", cache=True)
+        if response.status_code != 200:
+            return None
+        
+        team_xg = None
+        
+        # Extract JSON data from the raw HTML bytes; only the match gets decoded
+        match = UNDERSTAT_DATES_RE.search(response.content)
+        
+        if match:
+            json_str = match.group(1).decode('utf-8').replace("\\'", "'")
+            xg_data = json.loads(json_str)
+            
+            # Average xG/xGA over the last 5 matches, summed straight off the payload
+            recent = xg_data[-5:]
+            if recent:
+                avg_xg = sum(float(m.get('xG', 0)) for m in recent) / len(recent)
+                avg_xga = sum(float(m.get('xGA', 0)) for m in recent) / len(recent)
+                team_xg = (avg_xg, avg_xga)
+        
+        self.xg_cache[key] = team_xg
+        return team_xg
+    
     def fetch_team_news(self, fixtures):
         """Fetch injury and team news"""
         print("\n[4/5] Fetching team news...")
@@ -394,12 +722,11 @@ class CompleteFetcher:
                 'sortBy': 'publishedAt',
                 'pageSize': 5,
                 'apiKey': self.news_api_key,
-                'from': (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
+                'from': (self.now - timedelta(days=3)).strftime('%Y-%m-%d')
             }
             
             try:
-                response = requests.get(url, params=params)
-                self.api_calls['news'] += 1
+                response = self.get('news', url, params=params)
                 
                 if response.status_code == 200:
                     news_data = response.json()
@@ -407,11 +734,10 @@ class CompleteFetcher:
                     
                     injuries = []
                     for article in articles:
-                        title = article.get('title', '').lower()
-                        desc = article.get('description', '').lower()
+                        text = f"{article.get('title') or ''} {article.get('description') or ''}"
                         
                         # Look for injury keywords
-                        if any(word in title + desc for word in ['injury', 'injured', 'out', 'doubt', 'return']):
+                        if INJURY_KEYWORDS_RE.search(text):
                             injuries.append({
                                 'title': article.get('title', ''),
                                 'source': article.get('source', {}).get('name', ''),
@@ -424,8 +750,6 @@ class CompleteFetcher:
                     
             except Exception as e:
                 print(f"  ⚠️ News error: {e}")
-            
-            time.sleep(0.5)
         
         return fixtures
     
@@ -439,24 +763,11 @@ class CompleteFetcher:
         print(f"✅ Saved {len(fixtures)} enhanced fixtures")
         
         # Save for predict.py
-        simple_fixtures = []
-        for f in fixtures:
-            simple_fixtures.append({
-                'match_id': f['match_id'],
-                'date': f['date'],
-                'home_team': f['home_team'],
-                'away_team': f['away_team'],
-                'competition': 'Premier League',
-                'competition_code': 'PL',
-                'status': 'SCHEDULED'
-            })
-        
-        with open('data/upcoming_matches.csv', 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['match_id', 'date', 'home_team', 
-                                                   'away_team', 'competition', 
-                                                   'competition_code', 'status'])
-            writer.writeheader()
-            writer.writerows(simple_fixtures)
+        with open('data/upcoming_matches.csv', 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(UPCOMING_FIELDS)
+            writer.writerows((f['match_id'], f['date'], f['home_team'], f['away_team'],
+                              'Premier League', 'PL', 'SCHEDULED') for f in fixtures)
         
         # Show API usage summary
         print("\n📊 API Usage Summary:")
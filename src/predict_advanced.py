@@ -1,5 +1,6 @@
 import json
 import os
+from collections import Counter
 from datetime import datetime
 
 print("=" * 50)
@@ -7,6 +8,10 @@ print("ADVANCED PREDICTION ENGINE")
 print(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
 print("=" * 50)
 
+def blend(probs, other, weight):
+    """Blend two (home, draw, away) triples, giving `other` the given weight"""
+    return tuple((1 - weight) * p + weight * o for p, o in zip(probs, other))
+
 def generate_advanced_predictions():
     """Generate predictions using all data sources"""
     
@@ -39,27 +44,24 @@ def generate_advanced_predictions():
         # Adjust for H2H history
         if 'h2h' in fixture and fixture['h2h'].get('home_wins', 0) + fixture['h2h'].get('draws', 0) + fixture['h2h'].get('away_wins', 0) > 0:
             total_h2h = fixture['h2h']['home_wins'] + fixture['h2h']['draws'] + fixture['h2h']['away_wins']
-            h2h_home = fixture['h2h']['home_wins'] / total_h2h
-            h2h_draw = fixture['h2h']['draws'] / total_h2h
-            h2h_away = fixture['h2h']['away_wins'] / total_h2h
+            h2h_probs = (
+                fixture['h2h']['home_wins'] / total_h2h,
+                fixture['h2h']['draws'] / total_h2h,
+                fixture['h2h']['away_wins'] / total_h2h
+            )
             
             # Blend with 20% weight for H2H
-            base_home = 0.8 * base_home + 0.2 * h2h_home
-            base_draw = 0.8 * base_draw + 0.2 * h2h_draw
-            base_away = 0.8 * base_away + 0.2 * h2h_away
+            base_home, base_draw, base_away = blend((base_home, base_draw, base_away), h2h_probs, 0.2)
             
             print(f"  After H2H adjustment: H{base_home:.1%} D{base_draw:.1%} A{base_away:.1%}")
         
         # Adjust for market odds (if available)
         if 'market_probs' in fixture:
             # Blend with 30% weight for market
-            market_home = fixture['market_probs']['home']
-            market_draw = fixture['market_probs']['draw']
-            market_away = fixture['market_probs']['away']
+            market = fixture['market_probs']
+            market_probs = (market['home'], market['draw'], market['away'])
             
-            base_home = 0.7 * base_home + 0.3 * market_home
-            base_draw = 0.7 * base_draw + 0.3 * market_draw
-            base_away = 0.7 * base_away + 0.3 * market_away
+            base_home, base_draw, base_away = blend((base_home, base_draw, base_away), market_probs, 0.3)
             
             print(f"  After market adjustment: H{base_home:.1%} D{base_draw:.1%} A{base_away:.1%}")
         
@@ -179,10 +181,11 @@ def generate_advanced_predictions():
         print(f"  ✅ Final: H{final_home:.1%} D{final_draw:.1%} A{final_away:.1%}")
         print(f"  📊 Confidence: {confidence} ({confidence_score}/100)")
     
-    # Create final output
+    # Create final output (one clock reading so both timestamps agree)
+    now = datetime.now()
     output = {
-        'generated': datetime.now().isoformat(),
-        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'generated': now.isoformat(),
+        'last_updated': now.strftime('%Y-%m-%d %H:%M:%S'),
         'league': 'Premier League',
         'predictions_count': len(predictions),
         'predictions': predictions,
@@ -207,14 +210,12 @@ def generate_advanced_predictions():
     print("✅ Saved to predictions.json")
     
     # Show summary
-    high_conf = sum(1 for p in predictions if p['confidence'] == 'high')
-    med_conf = sum(1 for p in predictions if p['confidence'] == 'medium')
-    low_conf = sum(1 for p in predictions if p['confidence'] == 'low')
+    conf_counts = Counter(p['confidence'] for p in predictions)
     
     print(f"\n📊 Confidence Distribution:")
-    print(f"  High: {high_conf} matches")
-    print(f"  Medium: {med_conf} matches")
-    print(f"  Low: {low_conf} matches")
+    print(f"  High: {conf_counts['high']} matches")
+    print(f"  Medium: {conf_counts['medium']} matches")
+    print(f"  Low: {conf_counts['low']} matches")
 
 if __name__ == '__main__':
     generate_advanced_predictions()